@@ -1,18 +1,68 @@
-from sqlalchemy import create_engine, Column, String, DateTime, Text, JSON
+from sqlalchemy import create_engine, event, Column, String, DateTime, Text, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+from typing import Any, Dict, List
+import orjson
 import uuid
+import zlib
 
 DATABASE_URL = "sqlite:///./literary_analysis.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    poolclass=QueuePool,
+    pool_size=5,
+    max_overflow=10
+)
+
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection for concurrent reads and cheaper commits"""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed during writes; NORMAL skips the fsync per commit
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+class CompressedJSON(TypeDecorator):
+    """JSON value stored as a zlib-compressed orjson blob"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(orjson.dumps(value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Rows written before compression hold plain JSON text
+            return orjson.loads(value)
+        return orjson.loads(zlib.decompress(value))
+
+
 class AnalysisRecord(Base):
     __tablename__ = "analyses"
+    __table_args__ = (
+        # Serve the filtered, newest-first listing without a sort step
+        Index("ix_analyses_src_created", "source_type", "created_at"),
+        Index("ix_analyses_created", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -23,12 +73,24 @@ class AnalysisRecord(Base):
     extracted_text = Column(Text, nullable=True)
     mode = Column(String, nullable=False, default="fast")  # fast or smart
     model_version = Column(String, nullable=True)
-    result = Column(JSON, nullable=False)
+    result = Column(CompressedJSON, nullable=False)
 
 
 def init_db():
     """Initialize the database tables"""
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add any missing indexes
+    # to databases created before they were declared
+    for index in AnalysisRecord.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+def bulk_insert_records(db, rows: List[Dict[str, Any]]):
+    """Insert analysis rows with one executemany call and commit"""
+    if not rows:
+        return
+    db.execute(AnalysisRecord.__table__.insert(), rows)
+    db.commit()
 
 
 def get_db():
@@ -38,3 +100,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_session_factory():
+    """Get the session factory used for writes that outlive the request"""
+    return SessionLocal
+
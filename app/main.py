@@ -1,24 +1,43 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from app.routes import router
 from app.database import init_db
+from app.services.scraper import open_async_client, close_async_client
+from app.services.sentiment import warmup_models
+import anyio.to_thread
 import logging
 
+# Worker threads available for blocking analysis, OCR and database work
+THREADPOOL_SIZE = 64
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize database on startup
+    init_db()
+    logging.info("Database initialized")
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    open_async_client()
+    # Pay model warmup at boot rather than on the first request
+    await anyio.to_thread.run_sync(warmup_models)
+    logging.info("Sentiment models warmed up")
+    yield
+    await close_async_client()
+
+
 app = FastAPI(
     title="Literary Analysis API",
     description="API for analyzing text, URLs, and images with sentiment analysis",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Initialize database on startup
-@app.on_event("startup")
-async def startup_event():
-    init_db()
-    logging.info("Database initialized")
-
 app.include_router(router)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, HttpUrl, validator
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -51,8 +51,7 @@ class AnalysisResponse(BaseModel):
     url: Optional[str] = None
     filename: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AnalysisListResponse(BaseModel):
@@ -113,5 +112,4 @@ class LiteraryAnalysisResponse(BaseModel):
     language: str
     insights: LiteraryInsights
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query, BackgroundTasks, Header, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
 from typing import Optional, List
 from datetime import datetime
+import codecs
+import hashlib
+import uuid
 
 from app.models.schemas import (
     TextAnalysisRequest, URLAnalysisRequest, AnalysisResponse,
@@ -9,10 +14,10 @@ from app.models.schemas import (
     LiteraryAnalysisRequest, LiteraryAnalysisResponse, LiteraryInsights,
     InfluenceItem, AestheticStyle
 )
-from app.database import get_db, AnalysisRecord
-from app.services.analysis import analyze_text, compute_text_hash, analyze_text_file
-from app.services.scraper import fetch_article_text
-from app.services.ocr import ocr_image_bytes, ocr_pdf_bytes
+from app.database import get_db, get_session_factory, bulk_insert_records, AnalysisRecord
+from app.services.analysis import analyze_text_cached, compute_text_hash, compute_file_hash, analyze_text_file
+from app.services.scraper import fetch_article_text_async
+from app.services.ocr import ocr_image_file, ocr_pdf_file
 from app.services.sentiment import get_model_info
 from app.services.literary_analysis import analyze_literary_text
 
@@ -22,6 +27,138 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Read uploads in bounded chunks instead of one full-size read
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def _read_text_upload(file: UploadFile) -> str:
+    """Decode a UTF-8 upload incrementally, without holding its raw bytes"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts = []
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        parts.append(decoder.decode(chunk))
+    parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def _persist_record(session_factory: sessionmaker, values: dict):
+    """Insert an analysis row; runs as a background task after the response
+    
+    Failures are logged, not raised: the client already has the analysis_id,
+    which then never becomes retrievable.
+    """
+    db = session_factory()
+    try:
+        bulk_insert_records(db, [values])
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to persist analysis {values.get('id')}: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def _hash_and_analyze(text: str, mode: str):
+    """Hash and analyze text; CPU-bound, so endpoints run it in the threadpool"""
+    text_hash = compute_text_hash(text)
+    return text_hash, analyze_text_cached(text, text_hash, mode=mode)
+
+
+def _hash_and_analyze_literary(text: str, language: str, summary_length: str):
+    """Hash text and run literary analysis keyed by that hash (one threadpool hop)"""
+    text_hash = compute_text_hash(text)
+    return text_hash, analyze_literary_text(
+        text, language=language, summary_length=summary_length, text_hash=text_hash
+    )
+
+
+def _build_and_persist(
+    background_tasks: BackgroundTasks,
+    session_factory: sessionmaker,
+    *,
+    text: str,
+    text_hash: str,
+    mode: str,
+    result: dict,
+    source_type: SourceType,
+    url: Optional[str] = None,
+    filename: Optional[str] = None
+) -> AnalysisResponse:
+    """Build the response for a fresh analysis and schedule its row to be stored"""
+    analysis_id = str(uuid.uuid4())
+    created_at = datetime.utcnow()
+    
+    # Store in database once the response has been sent
+    background_tasks.add_task(_persist_record, session_factory, dict(
+        id=analysis_id,
+        created_at=created_at,
+        source_type=source_type.value,
+        url=url,
+        filename=filename,
+        raw_input_hash=text_hash,
+        extracted_text=text[:1000],  # Store first 1000 chars
+        mode=mode,
+        model_version=get_model_info(mode),
+        result=result
+    ))
+    
+    # Build response models without re-validating our own pipeline output
+    sentiment_result = SentimentResult.model_construct(**result["sentiment"])
+    analysis_result = AnalysisResult.model_construct(
+        word_count=result["word_count"],
+        sentiment=sentiment_result,
+        keywords=result["keywords"],
+        top_words=result["top_words"]
+    )
+    
+    return AnalysisResponse.model_construct(
+        analysis_id=analysis_id,
+        created_at=created_at,
+        source_type=source_type,
+        mode=mode,
+        result=analysis_result,
+        url=url,
+        filename=filename
+    )
+
+# Enum members by stored value; avoids SourceType(...) lookups per row
+_SOURCE_TYPES = {member.value: member for member in SourceType}
+
+# Stored source type value for literary analyses, resolved once
+_ST_TEXT = SourceType.text.value
+
+# Columns needed to rebuild an AnalysisResponse from a stored row
+_RESPONSE_COLUMNS = (
+    AnalysisRecord.id,
+    AnalysisRecord.created_at,
+    AnalysisRecord.source_type,
+    AnalysisRecord.mode,
+    AnalysisRecord.url,
+    AnalysisRecord.filename,
+    AnalysisRecord.result,
+)
+
+
+def _build_analysis_response(row) -> AnalysisResponse:
+    """Rebuild a response from a stored row (trusted data; skips validation)"""
+    result_data = row.result
+    sentiment_result = SentimentResult.model_construct(**result_data["sentiment"])
+    analysis_result = AnalysisResult.model_construct(
+        word_count=result_data["word_count"],
+        sentiment=sentiment_result,
+        keywords=result_data.get("keywords", []),
+        top_words=[tuple(item) for item in result_data.get("top_words") or []]
+    )
+    
+    return AnalysisResponse.model_construct(
+        analysis_id=row.id,
+        created_at=row.created_at,
+        source_type=_SOURCE_TYPES[row.source_type],
+        mode=row.mode,
+        result=analysis_result,
+        url=row.url,
+        filename=row.filename
+    )
+
 
 # ==================== V1 API Endpoints ====================
 
@@ -38,52 +175,31 @@ async def health_check():
 @router.post("/v1/analyze/text", response_model=AnalysisResponse, tags=["Analysis"])
 async def analyze_text_endpoint(
     request: TextAnalysisRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    session_factory: sessionmaker = Depends(get_session_factory)
 ):
     """
     Analyze text content
     
     - **text**: Text content to analyze
     - **mode**: Analysis mode - 'fast' (VADER) or 'smart' (transformer-based)
+    
+    The analysis is stored after the response is sent, so a GET for the
+    returned analysis_id may return 404 for a moment.
     """
+    mode = request.mode.value
     try:
-        # Perform analysis
-        result = analyze_text(request.text, mode=request.mode.value)
-        
-        # Create sentiment result model
-        sentiment_result = SentimentResult(**result["sentiment"])
-        analysis_result = AnalysisResult(
-            word_count=result["word_count"],
-            sentiment=sentiment_result,
-            keywords=result["keywords"],
-            top_words=result["top_words"]
-        )
-        
-        # Store in database
-        text_hash = compute_text_hash(request.text)
-        model_version = get_model_info(request.mode.value)
-        
-        analysis_record = AnalysisRecord(
-            source_type=SourceType.text.value,
-            raw_input_hash=text_hash,
-            extracted_text=request.text[:1000],  # Store first 1000 chars
-            mode=request.mode.value,
-            model_version=model_version,
-            result=result
-        )
-        
-        db.add(analysis_record)
-        db.commit()
-        db.refresh(analysis_record)
+        # Perform analysis off the event loop (cached for repeated inputs)
+        text_hash, result = await run_in_threadpool(_hash_and_analyze, request.text, mode)
         
-        return AnalysisResponse(
-            analysis_id=analysis_record.id,
-            created_at=analysis_record.created_at,
-            source_type=SourceType.text,
-            mode=analysis_record.mode,
-            result=analysis_result
+        return _build_and_persist(
+            background_tasks, session_factory,
+            text=request.text, text_hash=text_hash, mode=mode, result=result,
+            source_type=SourceType.text
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in text analysis: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -92,18 +208,23 @@ async def analyze_text_endpoint(
 @router.post("/v1/analyze/url", response_model=AnalysisResponse, tags=["Analysis"])
 async def analyze_url_endpoint(
     request: URLAnalysisRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    session_factory: sessionmaker = Depends(get_session_factory)
 ):
     """
     Analyze content from a URL
     
     - **url**: URL to fetch and analyze
     - **mode**: Analysis mode - 'fast' (VADER) or 'smart' (transformer-based)
+    
+    The analysis is stored after the response is sent, so a GET for the
+    returned analysis_id may return 404 for a moment.
     """
+    mode = request.mode.value
     try:
         # Fetch article text with SSRF protection
         url_str = str(request.url)
-        text = fetch_article_text(url_str)
+        text = await fetch_article_text_async(url_str)
         
         if not text or len(text.strip()) < 10:
             raise HTTPException(
@@ -111,45 +232,17 @@ async def analyze_url_endpoint(
                 detail="Could not extract meaningful text from URL"
             )
         
-        # Perform analysis
-        result = analyze_text(text, mode=request.mode.value)
+        # Perform analysis off the event loop (cached for repeated inputs)
+        text_hash, result = await run_in_threadpool(_hash_and_analyze, text, mode)
         
-        # Create response models
-        sentiment_result = SentimentResult(**result["sentiment"])
-        analysis_result = AnalysisResult(
-            word_count=result["word_count"],
-            sentiment=sentiment_result,
-            keywords=result["keywords"],
-            top_words=result["top_words"]
-        )
-        
-        # Store in database
-        text_hash = compute_text_hash(text)
-        model_version = get_model_info(request.mode.value)
-        
-        analysis_record = AnalysisRecord(
-            source_type=SourceType.url.value,
-            url=url_str,
-            raw_input_hash=text_hash,
-            extracted_text=text[:1000],
-            mode=request.mode.value,
-            model_version=model_version,
-            result=result
-        )
-        
-        db.add(analysis_record)
-        db.commit()
-        db.refresh(analysis_record)
-        
-        return AnalysisResponse(
-            analysis_id=analysis_record.id,
-            created_at=analysis_record.created_at,
-            source_type=SourceType.url,
-            mode=analysis_record.mode,
-            result=analysis_result,
-            url=url_str
+        return _build_and_persist(
+            background_tasks, session_factory,
+            text=text, text_hash=text_hash, mode=mode, result=result,
+            source_type=SourceType.url, url=url_str
         )
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -159,9 +252,10 @@ async def analyze_url_endpoint(
 
 @router.post("/v1/analyze/image", response_model=AnalysisResponse, tags=["Analysis"])
 async def analyze_image_endpoint(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     mode: str = Form(default="fast"),
-    db: Session = Depends(get_db)
+    session_factory: sessionmaker = Depends(get_session_factory)
 ):
     """
     Analyze text extracted from an image or PDF using OCR
@@ -170,10 +264,15 @@ async def analyze_image_endpoint(
     - **mode**: Analysis mode - 'fast' (VADER) or 'smart' (transformer-based)
     
     Requires Tesseract OCR to be installed on the system.
+    
+    The analysis is stored after the response is sent, so a GET for the
+    returned analysis_id may return 404 for a moment.
     """
     try:
-        # Read file content
-        content = await file.read()
+        # The upload is already spooled to a temporary file; hash and OCR it
+        # from there rather than from a full in-memory copy
+        await file.seek(0)
+        input_hash = await run_in_threadpool(compute_file_hash, file.file)
         
         # Determine file type and perform OCR
         filename = file.filename.lower()
@@ -181,9 +280,9 @@ async def analyze_image_endpoint(
         
         try:
             if ext == "pdf":
-                text = ocr_pdf_bytes(content)
+                text = await run_in_threadpool(ocr_pdf_file, file.file)
             else:
-                text = ocr_image_bytes(content)
+                text = await run_in_threadpool(ocr_image_file, file.file)
         except Exception as ocr_error:
             logger.error(f"OCR error: {ocr_error}")
             raise HTTPException(
@@ -197,43 +296,15 @@ async def analyze_image_endpoint(
                 detail="Could not extract meaningful text from image. The image may be blank or unreadable."
             )
         
-        # Perform analysis
-        result = analyze_text(text, mode=mode)
+        # Perform analysis off the event loop, cached on the OCR'd text: the
+        # upload's hash could equal a posted text's hash and doesn't identify
+        # the text OCR produced
+        _, result = await run_in_threadpool(_hash_and_analyze, text, mode)
         
-        # Create response models
-        sentiment_result = SentimentResult(**result["sentiment"])
-        analysis_result = AnalysisResult(
-            word_count=result["word_count"],
-            sentiment=sentiment_result,
-            keywords=result["keywords"],
-            top_words=result["top_words"]
-        )
-        
-        # Store in database
-        text_hash = compute_text_hash(text)
-        model_version = get_model_info(mode)
-        
-        analysis_record = AnalysisRecord(
-            source_type=SourceType.image.value,
-            filename=file.filename,
-            raw_input_hash=text_hash,
-            extracted_text=text[:1000],
-            mode=mode,
-            model_version=model_version,
-            result=result
-        )
-        
-        db.add(analysis_record)
-        db.commit()
-        db.refresh(analysis_record)
-        
-        return AnalysisResponse(
-            analysis_id=analysis_record.id,
-            created_at=analysis_record.created_at,
-            source_type=SourceType.image,
-            mode=analysis_record.mode,
-            result=analysis_result,
-            filename=file.filename
+        return _build_and_persist(
+            background_tasks, session_factory,
+            text=text, text_hash=input_hash, mode=mode, result=result,
+            source_type=SourceType.image, filename=file.filename
         )
         
     except HTTPException:
@@ -243,41 +314,67 @@ async def analyze_image_endpoint(
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+def _analysis_etag(analysis_id: str, created_at: datetime) -> str:
+    """Strong ETag for a stored analysis (rows are never modified after insert)"""
+    digest = hashlib.blake2s(f"{analysis_id}:{created_at.isoformat()}".encode(), digest_size=8)
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value (list, weak tags or *) against etag"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag or tag == "*":
+            return True
+    return False
+
+
 @router.get("/v1/analyses/{analysis_id}", response_model=AnalysisResponse, tags=["Analysis"])
-async def get_analysis(analysis_id: str, db: Session = Depends(get_db)):
+def get_analysis(
+    analysis_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     Retrieve a specific analysis by ID
     
     - **analysis_id**: Unique identifier of the analysis
+    
+    Responses carry an ETag; send it back in If-None-Match to get
+    304 Not Modified instead of the full body.
     """
-    analysis = db.query(AnalysisRecord).filter(AnalysisRecord.id == analysis_id).first()
+    if if_none_match:
+        # Revalidation only needs the timestamp, not the stored result
+        created_at = (
+            db.query(AnalysisRecord.created_at)
+            .filter(AnalysisRecord.id == analysis_id)
+            .scalar()
+        )
+        if created_at is None:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        etag = _analysis_etag(analysis_id, created_at)
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+    
+    analysis = (
+        db.query(AnalysisRecord)
+        .with_entities(*_RESPONSE_COLUMNS)
+        .filter(AnalysisRecord.id == analysis_id)
+        .first()
+    )
     
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
-    # Reconstruct response
-    result_data = analysis.result
-    sentiment_result = SentimentResult(**result_data["sentiment"])
-    analysis_result = AnalysisResult(
-        word_count=result_data["word_count"],
-        sentiment=sentiment_result,
-        keywords=result_data.get("keywords", []),
-        top_words=result_data.get("top_words", [])
-    )
-    
-    return AnalysisResponse(
-        analysis_id=analysis.id,
-        created_at=analysis.created_at,
-        source_type=SourceType(analysis.source_type),
-        mode=analysis.mode,
-        result=analysis_result,
-        url=analysis.url,
-        filename=analysis.filename
-    )
+    response.headers["ETag"] = _analysis_etag(analysis.id, analysis.created_at)
+    return _build_analysis_response(analysis)
 
 
 @router.get("/v1/analyses", response_model=AnalysisListResponse, tags=["Analysis"])
-async def list_analyses(
+def list_analyses(
     source_type: Optional[SourceType] = Query(None, description="Filter by source type"),
     limit: int = Query(default=10, ge=1, le=100, description="Number of results to return"),
     offset: int = Query(default=0, ge=0, description="Number of results to skip"),
@@ -295,35 +392,22 @@ async def list_analyses(
     if source_type:
         query = query.filter(AnalysisRecord.source_type == source_type.value)
     
-    # Get total count
-    total = query.count()
+    # Get total count (plain COUNT over the index instead of a subquery)
+    total = query.with_entities(func.count(AnalysisRecord.id)).scalar()
     
-    # Apply pagination and ordering
-    analyses = query.order_by(AnalysisRecord.created_at.desc()).offset(offset).limit(limit).all()
+    # Apply pagination and ordering, loading only the columns the response needs
+    rows = (
+        query.with_entities(*_RESPONSE_COLUMNS)
+        .order_by(AnalysisRecord.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
     
     # Convert to response models
-    analysis_responses = []
-    for analysis in analyses:
-        result_data = analysis.result
-        sentiment_result = SentimentResult(**result_data["sentiment"])
-        analysis_result = AnalysisResult(
-            word_count=result_data["word_count"],
-            sentiment=sentiment_result,
-            keywords=result_data.get("keywords", []),
-            top_words=result_data.get("top_words", [])
-        )
-        
-        analysis_responses.append(AnalysisResponse(
-            analysis_id=analysis.id,
-            created_at=analysis.created_at,
-            source_type=SourceType(analysis.source_type),
-            mode=analysis.mode,
-            result=analysis_result,
-            url=analysis.url,
-            filename=analysis.filename
-        ))
+    analysis_responses = [_build_analysis_response(row) for row in rows]
     
-    return AnalysisListResponse(
+    return AnalysisListResponse.model_construct(
         total=total,
         limit=limit,
         offset=offset,
@@ -334,7 +418,8 @@ async def list_analyses(
 @router.post("/v1/analyze/literary", response_model=LiteraryAnalysisResponse, tags=["Literary Analysis"])
 async def analyze_literary_endpoint(
     request: LiteraryAnalysisRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    session_factory: sessionmaker = Depends(get_session_factory)
 ):
     """
     Perform enhanced literary analysis on text to extract:
@@ -349,13 +434,19 @@ async def analyze_literary_endpoint(
     - **text**: Text to analyze (minimum 200 characters)
     - **language**: Output language - 'english' (default) or 'spanish'
     - **summary_length**: Summary length - 'short' or 'medium' (default)
+    
+    The analysis is stored after the response is sent, so a GET for the
+    returned analysis_id may return 404 for a moment.
     """
+    language = request.language.value
     try:
-        # Perform literary analysis
-        insights_dict = analyze_literary_text(
-            text=request.text,
-            language=request.language.value,
-            summary_length=request.summary_length.value
+        # Perform literary analysis (repeated texts are served from the
+        # service's cache; each request still gets its own id below)
+        text_hash, insights_dict = await run_in_threadpool(
+            _hash_and_analyze_literary,
+            request.text,
+            language,
+            request.summary_length.value
         )
         
         # Create response models
@@ -385,32 +476,31 @@ async def analyze_literary_endpoint(
             disclaimer=insights_dict["disclaimer"]
         )
         
-        # Store in database
-        text_hash = compute_text_hash(request.text)
-        
         # Prepare result dict for storage
         result_dict = {
             "literary_insights": insights_dict
         }
         
-        analysis_record = AnalysisRecord(
-            source_type=SourceType.text.value,
+        analysis_id = str(uuid.uuid4())
+        created_at = datetime.utcnow()
+        
+        # Store in database once the response has been sent
+        background_tasks.add_task(_persist_record, session_factory, dict(
+            id=analysis_id,
+            created_at=created_at,
+            source_type=_ST_TEXT,
             raw_input_hash=text_hash,
             extracted_text=request.text[:1000],
             mode="literary",
             model_version="literary_analysis_v1",
             result=result_dict
-        )
-        
-        db.add(analysis_record)
-        db.commit()
-        db.refresh(analysis_record)
+        ))
         
         return LiteraryAnalysisResponse(
-            analysis_id=analysis_record.id,
-            created_at=analysis_record.created_at,
+            analysis_id=analysis_id,
+            created_at=created_at,
             source_type=SourceType.text,
-            language=request.language.value,
+            language=language,
             insights=literary_insights
         )
         
@@ -427,8 +517,8 @@ async def analyze_literary_endpoint(
 @router.post("/analyze-file/", tags=["Legacy"])
 async def analyze_file(file: UploadFile = File(...)):
     """Legacy endpoint - use /v1/analyze/text instead"""
-    text = await file.read()
-    result = analyze_text_file(text.decode("utf-8"))
+    text = await _read_text_upload(file)
+    result = await run_in_threadpool(analyze_text_file, text)
     return result
 
 
@@ -436,8 +526,8 @@ async def analyze_file(file: UploadFile = File(...)):
 async def analyze_url(url: str = Form(...)):
     """Legacy endpoint - use /v1/analyze/url instead"""
     try:
-        text = fetch_article_text(url)
-        result = analyze_text_file(text)
+        text = await fetch_article_text_async(url)
+        result = await run_in_threadpool(analyze_text_file, text)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -446,14 +536,14 @@ async def analyze_url(url: str = Form(...)):
 @router.post("/analyze-image/", tags=["Legacy"])
 async def analyze_image(file: UploadFile = File(...)):
     """Legacy endpoint - use /v1/analyze/image instead"""
-    content = await file.read()
+    await file.seek(0)
     ext = file.filename.lower().split('.')[-1]
     try:
         if ext == "pdf":
-            text = ocr_pdf_bytes(content)
+            text = await run_in_threadpool(ocr_pdf_file, file.file)
         else:
-            text = ocr_image_bytes(content)
-        result = analyze_text_file(text)
+            text = await run_in_threadpool(ocr_image_file, file.file)
+        result = await run_in_threadpool(analyze_text_file, text)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
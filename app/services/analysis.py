@@ -1,73 +1,166 @@
 from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
 import re
 import hashlib
-from typing import Dict, Any
+from typing import Dict, Any, BinaryIO
 from app.services.sentiment import analyze_sentiment, get_model_info
-from app.services.keywords import extract_keywords_tfidf
+from app.services.cache import LRUCache
 
+# Compiled once at import; both analysis entry points share them.
+# The minimum length is folded into the pattern so short tokens never
+# reach Python code.
+_WORD_RE = re.compile(r'\b[a-záéíóúñü]{4,}\b')
 
-def analyze_text(text: str, mode: str = "fast") -> Dict[str, Any]:
+# Common stop words (Spanish and English)
+_STOPWORDS = frozenset("""
+de la que el y a en se no es por un con una los las del al como más pero sus le ha o lo
+the and to of in is it you that he was for on are with as they be at one have this from
+""".split())
+
+# ASCII fast path for tokenizing: letters pass through, other word characters
+# (digits, underscore) become '#' so tokens touching them can be dropped like
+# the regex's \b would, and everything else becomes a separator
+_ASCII_TOKEN_TABLE = str.maketrans({
+    i: ('#' if chr(i).isalnum() or chr(i) == '_' else ' ')
+    for i in range(128) if not 'a' <= chr(i) <= 'z'
+})
+
+# Texts shorter than this take keywords from the word counts instead of
+# fitting TF-IDF, which has too few sentences to work with anyway
+SHORT_TEXT_CHARS = 256
+
+# Characters/bytes fed to the hasher per update
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Memoized analysis results keyed by (input hash, mode)
+_analysis_cache = LRUCache(maxsize=1024)
+
+
+def _count_words(text: str) -> Counter:
+    """Count non-stopword tokens longer than 3 chars without intermediate lists"""
+    lower = text.lower()
+    counter = Counter()
+    if lower.isascii():
+        # translate + split run in C and match _WORD_RE's tokens on ASCII input
+        counter.update(
+            word for word in lower.translate(_ASCII_TOKEN_TABLE).split()
+            if len(word) > 3 and '#' not in word and word not in _STOPWORDS
+        )
+        return counter
+    for match in _WORD_RE.finditer(lower):
+        word = match.group()
+        if word not in _STOPWORDS:
+            counter[word] += 1
+    return counter
+
+
+def analyze_text(
+    text: str,
+    mode: str = "fast",
+    *,
+    include_keywords: bool = True,
+    include_top_words: bool = True
+) -> Dict[str, Any]:
     """
     Perform comprehensive text analysis
     
     Args:
         text: Text to analyze
         mode: Analysis mode - "fast" or "smart"
+        include_keywords: Extract keywords - TF-IDF, or top words for short texts (empty list if False)
+        include_top_words: Compute the most frequent words (None if False)
         
     Returns:
         Dictionary with analysis results including sentiment, keywords, and word stats
     """
-    # Basic word analysis
-    words = re.findall(r'\b[a-záéíóúñü]+\b', text.lower())
-    
-    # Common stop words (Spanish and English)
-    stopwords = set("""
-    de la que el y a en se no es por un con una los las del al como más pero sus le ha o lo
-    the and to of in is it you that he was for on are with as they be at one have this from
-    """.split())
+    # Basic word analysis (tokenize, filter and count in one pass)
+    counter = _count_words(text)
     
-    filtered = [w for w in words if w not in stopwords and len(w) > 3]
+    short_text = len(text) < SHORT_TEXT_CHARS
     
-    # Get top words
-    word_counts = Counter(filtered).most_common(10)
+    # Top words (heap selection over the vocabulary, no full sort)
+    word_counts = None
+    if include_top_words or (include_keywords and short_text):
+        word_counts = nlargest(10, counter.items(), key=itemgetter(1))
     
     # Sentiment analysis
     sentiment = analyze_sentiment(text, mode=mode)
     
-    # Extract keywords
-    keywords = extract_keywords_tfidf(text, max_keywords=10)
+    # Extract keywords: short texts reuse the most frequent words, longer ones
+    # use TF-IDF (imported lazily; scikit-learn is slow to import)
+    keywords = []
+    if include_keywords:
+        if short_text:
+            keywords = [word for word, _ in word_counts]
+        else:
+            from app.services.keywords import extract_keywords_tfidf
+            keywords = extract_keywords_tfidf(text, max_keywords=10)
     
     # Build result
     result = {
-        "word_count": len(filtered),
+        "word_count": sum(counter.values()),
         "sentiment": sentiment,
         "keywords": keywords,
-        "top_words": word_counts
+        "top_words": word_counts if include_top_words else None
     }
     
     return result
 
 
+def analyze_text_cached(text: str, text_hash: str, mode: str = "fast") -> Dict[str, Any]:
+    """
+    Memoized variant of analyze_text for repeated inputs
+    
+    Args:
+        text: Text to analyze
+        text_hash: Hash identifying the input (see compute_text_hash)
+        mode: Analysis mode - "fast" or "smart"
+        
+    Returns:
+        Analysis result dictionary, shared between callers - treat as read-only
+    """
+    key = (text_hash, mode)
+    result = _analysis_cache.get(key)
+    if result is None:
+        result = analyze_text(text, mode=mode)
+        _analysis_cache.put(key, result)
+    return result
+
+
 def compute_text_hash(text: str) -> str:
     """Compute SHA-256 hash of text for deduplication"""
-    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    # Encode in slices so large inputs never hold a full UTF-8 copy
+    digest = hashlib.sha256()
+    for start in range(0, len(text), HASH_CHUNK_SIZE):
+        digest.update(text[start:start + HASH_CHUNK_SIZE].encode('utf-8'))
+    return digest.hexdigest()
+
+
+def compute_file_hash(fp: BinaryIO) -> str:
+    """Compute SHA-256 hash of a binary file object, then rewind it"""
+    fp.seek(0)
+    if hasattr(hashlib, "file_digest"):  # Python 3.11+
+        digest = hashlib.file_digest(fp, "sha256")
+    else:
+        digest = hashlib.sha256()
+        while chunk := fp.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    fp.seek(0)
+    return digest.hexdigest()
 
 
 def analyze_text_file(text: str):
     """Legacy function for backward compatibility - deprecated"""
     from app.services.report_writer import generate_pdf_report
     
-    words = re.findall(r'\b[a-záéíóúñü]+\b', text.lower())
-    stopwords = set("""
-    de la que el y a en se no es por un con una los las del al como más pero sus le ha o lo
-    """.split())
-    filtered = [w for w in words if w not in stopwords and len(w) > 3]
-    top_words = Counter(filtered).most_common(10)
+    # Keywords are not part of the legacy output, so skip TF-IDF entirely
+    analysis = analyze_text(text, mode="fast", include_keywords=False)
+    top_words = analysis["top_words"]
     
     # Use old sentiment format for compatibility
-    sentiment_new = analyze_sentiment(text, mode="fast")
     sentiment = {
-        "polarity": sentiment_new.get("polarity_score", 0),
+        "polarity": analysis["sentiment"].get("polarity_score", 0),
         "subjectivity": 0.5  # Not available in VADER
     }
 
@@ -78,7 +171,7 @@ def analyze_text_file(text: str):
         pass  # Ignore report generation errors
 
     return {
-        "word_count": len(filtered),
+        "word_count": analysis["word_count"],
         "top_words": top_words,
         "sentiment": sentiment,
         "report_path": output_path
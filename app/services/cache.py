@@ -0,0 +1,50 @@
+"""
+In-process caches shared by the analysis services.
+
+Entries are keyed by input digests rather than by the input text itself so
+that large documents are not kept alive by the cache.
+"""
+
+from collections import OrderedDict
+from hashlib import blake2b
+from threading import Lock
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with a fixed number of entries"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value for key (marking it recently used) or default"""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return default
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def text_digest(text: str) -> bytes:
+    """Return a compact 128-bit digest of text for use in cache keys"""
+    return blake2b(text.encode('utf-8'), digest_size=16).digest()
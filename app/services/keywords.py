@@ -1,6 +1,39 @@
+from sklearn.base import clone
 from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
 from typing import List
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
 import re
+from app.services.cache import LRUCache, text_digest
+
+# Patterns compiled once at import instead of on every call
+_SENT_SPLIT = re.compile(r'[.!?]+')
+_WORDS_EN4 = re.compile(r'\b[a-zA-Z]{4,}\b')
+
+# Common English stop words for the frequency fallback
+_FALLBACK_STOPWORDS = frozenset([
+    'this', 'that', 'these', 'those', 'with', 'from', 'have', 'has',
+    'will', 'been', 'were', 'was', 'are', 'the', 'and', 'for', 'not',
+    'but', 'or', 'as', 'at', 'by', 'an', 'be', 'to', 'of', 'in', 'it',
+    'is', 'on', 'you', 'all', 'can', 'her', 'had', 'how', 'our', 'out',
+    'day', 'get', 'him', 'his', 'man', 'new', 'now',
+    'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let',
+    'put', 'say', 'she', 'too', 'use'
+])
+
+# Vectorizer configuration built once; each call clones it and only sets
+# the number of features
+_TFIDF_PROTO = TfidfVectorizer(
+    stop_words='english',
+    ngram_range=(1, 2),  # unigrams and bigrams
+    min_df=1,
+    dtype=np.float32  # keyword ranking doesn't need double precision
+)
+
+# Memoized keyword lists keyed by (text digest, max_keywords)
+_keyword_cache = LRUCache(maxsize=256)
 
 
 def extract_keywords_tfidf(text: str, max_keywords: int = 10) -> List[str]:
@@ -14,15 +47,25 @@ def extract_keywords_tfidf(text: str, max_keywords: int = 10) -> List[str]:
     Returns:
         List of extracted keywords
     """
+    key = (text_digest(text), max_keywords)
+    keywords = _keyword_cache.get(key)
+    if keywords is None:
+        keywords = tuple(_extract_keywords(text, max_keywords))
+        _keyword_cache.put(key, keywords)
+    return list(keywords)
+
+
+def _extract_keywords(text: str, max_keywords: int) -> List[str]:
+    """Uncached keyword extraction behind extract_keywords_tfidf"""
     try:
         # Simple preprocessing
         # Split into sentences for TF-IDF
-        sentences = re.split(r'[.!?]+', text)
+        sentences = _SENT_SPLIT.split(text)
         sentences = [s.strip() for s in sentences if s.strip()]
         
         if len(sentences) < 2:
             # If too few sentences, split into words and return most unique ones
-            words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
+            words = _WORDS_EN4.findall(text.lower())
             # Return unique words (simple approach)
             unique_words = []
             seen = set()
@@ -33,43 +76,34 @@ def extract_keywords_tfidf(text: str, max_keywords: int = 10) -> List[str]:
             return unique_words[:max_keywords]
         
         # Use TF-IDF to find important words
-        vectorizer = TfidfVectorizer(
-            max_features=max_keywords,
-            stop_words='english',
-            ngram_range=(1, 2),  # unigrams and bigrams
-            min_df=1
-        )
+        vectorizer = clone(_TFIDF_PROTO).set_params(max_features=max_keywords)
         
         tfidf_matrix = vectorizer.fit_transform(sentences)
         feature_names = vectorizer.get_feature_names_out()
         
         # Get average TF-IDF scores
-        avg_scores = tfidf_matrix.mean(axis=0).A1
+        avg_scores = np.asarray(tfidf_matrix.mean(axis=0)).ravel()
         
-        # Get top keywords
-        top_indices = avg_scores.argsort()[-max_keywords:][::-1]
+        # Get top keywords (partial selection, then order just those)
+        k = min(max_keywords, avg_scores.size)
+        if k <= 0:
+            return []
+        top_indices = np.argpartition(avg_scores, -k)[-k:]
+        top_indices = top_indices[np.argsort(-avg_scores[top_indices])]
         keywords = [feature_names[i] for i in top_indices if avg_scores[i] > 0]
         
         return keywords
     
     except Exception as e:
         # Fallback to simple word frequency if TF-IDF fails
-        words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
-        from collections import Counter
-        
-        # Common English stop words
-        stop_words = set([
-            'this', 'that', 'these', 'those', 'with', 'from', 'have', 'has',
-            'will', 'been', 'were', 'was', 'are', 'the', 'and', 'for', 'not',
-            'but', 'or', 'as', 'at', 'by', 'an', 'be', 'to', 'of', 'in', 'it',
-            'is', 'on', 'that', 'this', 'with', 'was', 'for', 'are', 'but',
-            'not', 'you', 'all', 'can', 'her', 'had', 'how', 'our', 'out',
-            'day', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now',
-            'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let',
-            'put', 'say', 'she', 'too', 'use'
-        ])
-        
-        filtered_words = [w for w in words if w not in stop_words]
-        counter = Counter(filtered_words)
-        
-        return [word for word, _ in counter.most_common(max_keywords)]
+        return _frequency_keywords(text, max_keywords)
+
+
+def _frequency_keywords(text: str, max_keywords: int) -> List[str]:
+    """Most frequent non-stopword words of 4+ letters"""
+    words = _WORDS_EN4.findall(text.lower())
+    
+    filtered_words = [w for w in words if w not in _FALLBACK_STOPWORDS]
+    counter = Counter(filtered_words)
+    
+    return [word for word, _ in nlargest(max_keywords, counter.items(), key=itemgetter(1))]
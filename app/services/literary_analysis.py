@@ -5,13 +5,34 @@ This module provides enhanced literary analysis including summaries, movements,
 influences, and aesthetic styles. The analysis is probabilistic and interpretive.
 """
 
+import os
 import re
 import logging
-from typing import Dict, Any, List
+from dataclasses import dataclass
+from heapq import nlargest
+from operator import itemgetter
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
 from collections import Counter
+from app.services.cache import LRUCache, text_digest
 
 logger = logging.getLogger(__name__)
 
+# Patterns compiled once at import instead of on every call
+_SENTENCE_RE = re.compile(r'[^.!?]+')
+_WORDS_ES = re.compile(r'\b[a-záéíóúñü]+\b')
+
+# Medium summaries use 3-5 sentences depending on the total count (a third
+# of it), which stops mattering past this many sentences
+_MEDIUM_SCAN_SENTENCES = 15
+
+# Common stop words (Spanish and English)
+_STOPWORDS = frozenset("""
+de la que el y a en se no es por un con una los las del al como más pero sus le ha o lo
+the and to of in is it you that he was for on are with as they be at one have this from
+i we or an my their which what can would will been been has had been do did does but so
+if all some any each much many other such about up out into through than then now
+""".split())
+
 # Literary movement keywords (expanded for better detection)
 MOVEMENT_KEYWORDS = {
     "romanticism": ["emotion", "nature", "imagination", "individual", "passion", "sublime", "feeling", "heart", "soul", "beauty"],
@@ -62,84 +83,260 @@ PHILOSOPHICAL_INFLUENCES = {
     "postcolonialism": ["colonial", "empire", "identity", "hybridity", "subaltern"]
 }
 
+# Disclaimer attached to every literary analysis, per output language
+DISCLAIMERS = {
+    "english": (
+        "This analysis is probabilistic and interpretive in nature. "
+        "The identified movements, influences, and styles are suggestions based on "
+        "computational text analysis and should not be considered definitive literary criticism. "
+        "Human expert analysis may yield different interpretations."
+    ),
+    "spanish": (
+        "Este análisis es de naturaleza probabilística e interpretativa. "
+        "Los movimientos, influencias y estilos identificados son sugerencias basadas en "
+        "análisis computacional de texto y no deben considerarse crítica literaria definitiva. "
+        "El análisis de expertos humanos puede producir interpretaciones diferentes."
+    )
+}
+
+# Spanish names for movements/styles, confidence levels and influence types
+MOVEMENT_TRANSLATIONS_ES = {
+    "Romanticism": "Romanticismo",
+    "Realism": "Realismo",
+    "Modernism": "Modernismo",
+    "Postmodernism": "Posmodernismo",
+    "Symbolism": "Simbolismo",
+    "Naturalism": "Naturalismo",
+    "Surrealism": "Surrealismo",
+    "Classicism": "Clasicismo",
+    "Expressionism": "Expresionismo",
+    "Existentialism": "Existencialismo",
+    "Contemporary/Mixed": "Contemporáneo/Mixto",
+    "Contemporary": "Contemporáneo"
+}
+
+CONFIDENCE_TRANSLATIONS_ES = {
+    "high": "alta",
+    "medium": "media",
+    "low": "baja"
+}
+
+INFLUENCE_TYPE_TRANSLATIONS_ES = {
+    "author": "autor",
+    "philosophy": "filosofía",
+    "school": "escuela",
+    "historical": "histórico",
+    "cultural": "cultural"
+}
+
+# Detector tables, in the order count_group_matches returns their counts
+_DETECTOR_TABLES = (MOVEMENT_KEYWORDS, INFLUENTIAL_AUTHORS, PHILOSOPHICAL_INFLUENCES)
+_MOVEMENTS, _AUTHORS, _PHILOSOPHIES = range(len(_DETECTOR_TABLES))
+
+# Merged index: keyword -> [(table, group position), ...] across all detector
+# tables, so every group's matches come from one pass over the matched keywords
+_KEYWORD_GROUPS: Dict[str, List[Tuple[int, int]]] = {}
+for _table, _groups in enumerate(_DETECTOR_TABLES):
+    for _position, _keywords in enumerate(_groups.values()):
+        for _keyword in _keywords:
+            _KEYWORD_GROUPS.setdefault(_keyword, []).append((_table, _position))
+
+# Every keyword the detectors look for; a group's score only depends on which
+# of these occur in the text, so they are all matched in one pass
+_ALL_KEYWORDS = frozenset(_KEYWORD_GROUPS)
+
+# Group names and sizes in table order
+_MOVEMENT_GROUPS = tuple(
+    (movement, max(len(keywords), 1))
+    for movement, keywords in MOVEMENT_KEYWORDS.items()
+)
+_AUTHOR_NAMES = tuple(author.title() for author in INFLUENTIAL_AUTHORS)
+_PHILOSOPHY_NAMES = tuple(philosophy.title() for philosophy in PHILOSOPHICAL_INFLUENCES)
+
+# Influences reported per text; detection stops once this many are found
+MAX_INFLUENCES = 5
+
+# Try to build an Aho-Corasick automaton for single-pass matching (optional)
+try:
+    import ahocorasick
+    
+    _keyword_automaton = ahocorasick.Automaton()
+    for _keyword in _ALL_KEYWORDS:
+        _keyword_automaton.add_word(_keyword, _keyword)
+    _keyword_automaton.make_automaton()
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    _keyword_automaton = None
+    AHOCORASICK_AVAILABLE = False
+    logger.info("pyahocorasick not installed. Keyword detection will use substring scans.")
+
+# Optional Numba-compiled keyword scan, opt-in via LITERARY_NUMBA=1 because
+# importing and compiling Numba adds seconds to startup. Keywords are packed
+# into one byte buffer with offsets and searched in the UTF-8 encoded text
+# (all keywords are ASCII, so byte matches are exactly character matches)
+NUMBA_AVAILABLE = False
+if os.getenv("LITERARY_NUMBA") == "1":
+    try:
+        import numpy as np
+        from numba import njit
+        
+        @njit(cache=True)
+        def _find_keywords(text, offsets, data, found):
+            n = text.shape[0]
+            for k in range(offsets.shape[0] - 1):
+                start = offsets[k]
+                m = offsets[k + 1] - start
+                for i in range(n - m + 1):
+                    j = 0
+                    while j < m and text[i + j] == data[start + j]:
+                        j += 1
+                    if j == m:
+                        found[k] = True
+                        break
+        
+        _numba_keywords = tuple(sorted(_ALL_KEYWORDS))
+        _encoded_keywords = [keyword.encode('ascii') for keyword in _numba_keywords]
+        _keyword_offsets = np.zeros(len(_encoded_keywords) + 1, dtype=np.int64)
+        _keyword_offsets[1:] = np.cumsum([len(keyword) for keyword in _encoded_keywords])
+        _keyword_data = np.frombuffer(b"".join(_encoded_keywords), dtype=np.uint8)
+        NUMBA_AVAILABLE = True
+    except ImportError:
+        logger.warning("LITERARY_NUMBA=1 but numba is not installed. Using the default keyword scan.")
+
+
+def _match_keywords_numba(text_lower: str) -> frozenset:
+    """Numba backend for match_keywords"""
+    text = np.frombuffer(text_lower.encode('utf-8'), dtype=np.uint8)
+    found = np.zeros(len(_numba_keywords), dtype=np.bool_)
+    _find_keywords(text, _keyword_offsets, _keyword_data, found)
+    return frozenset(keyword for keyword, hit in zip(_numba_keywords, found) if hit)
+
 
-def extract_text_features(text: str) -> Dict[str, Any]:
+# Memoized results keyed by text digest. Features keep the source text alive,
+# so only a few are retained; they let other language/summary variants of a
+# recent text skip re-tokenizing it
+_literary_cache = LRUCache(maxsize=256)
+_features_cache = LRUCache(maxsize=32)
+
+
+def match_keywords(text_lower: str) -> frozenset:
+    """Return the detector keywords that occur (as substrings) in the lowercased text"""
+    if NUMBA_AVAILABLE:
+        return _match_keywords_numba(text_lower)
+    if _keyword_automaton is not None:
+        return frozenset(keyword for _, keyword in _keyword_automaton.iter(text_lower))
+    return frozenset(keyword for keyword in _ALL_KEYWORDS if keyword in text_lower)
+
+
+def count_group_matches(matched: FrozenSet[str]) -> Tuple[List[int], ...]:
+    """Count distinct matched keywords per group of each detector table"""
+    counts = tuple([0] * len(groups) for groups in _DETECTOR_TABLES)
+    for keyword in matched:
+        for table, position in _KEYWORD_GROUPS[keyword]:
+            counts[table][position] += 1
+    return counts
+
+
+@dataclass(frozen=True)
+class TextFeatures:
+    """Features extracted once per text and shared by all detectors"""
+    __slots__ = (
+        "text", "text_lower", "words", "filtered_words",
+        "word_count", "char_count", "matched_keywords", "group_matches"
+    )
+    
+    text: str
+    text_lower: str
+    words: List[str]
+    filtered_words: List[str]
+    word_count: int
+    char_count: int
+    matched_keywords: FrozenSet[str]
+    group_matches: Tuple[List[int], ...]
+
+
+def extract_text_features(text: str) -> TextFeatures:
     """Extract features from text for analysis"""
     # Clean and tokenize
     text_lower = text.lower()
-    words = re.findall(r'\b[a-záéíóúñü]+\b', text_lower)
+    words = _WORDS_ES.findall(text_lower)
     
-    # Remove common stop words
-    stopwords = set("""
-    de la que el y a en se no es por un con una los las del al como más pero sus le ha o lo
-    the and to of in is it you that he was for on are with as they be at one have this from
-    i we or an my their which what can would will been been has had been do did does but so
-    if all some any each much many other such about up out into through than then now
-    """.split())
+    filtered_words = [w for w in words if w not in _STOPWORDS and len(w) > 3]
+    matched_keywords = match_keywords(text_lower)
     
-    filtered_words = [w for w in words if w not in stopwords and len(w) > 3]
-    
-    return {
-        "text": text,
-        "text_lower": text_lower,
-        "words": words,
-        "filtered_words": filtered_words,
-        "word_count": len(filtered_words),
-        "char_count": len(text)
-    }
+    return TextFeatures(
+        text=text,
+        text_lower=text_lower,
+        words=words,
+        filtered_words=filtered_words,
+        word_count=len(filtered_words),
+        char_count=len(text),
+        matched_keywords=matched_keywords,
+        group_matches=count_group_matches(matched_keywords)
+    )
 
 
-def detect_literary_movement(features: Dict[str, Any]) -> Dict[str, float]:
+def detect_literary_movement(features: TextFeatures) -> Dict[str, float]:
     """Detect literary movements based on keyword analysis"""
-    text_lower = features["text_lower"]
-    filtered_words = features["filtered_words"]
-    word_set = set(filtered_words)
+    movement_matches = features.group_matches[_MOVEMENTS]
     
     movement_scores = {}
     
-    for movement, keywords in MOVEMENT_KEYWORDS.items():
-        # Count keyword matches
-        matches = sum(1 for keyword in keywords if keyword in text_lower)
-        # Normalize by number of keywords and text length
-        score = matches / max(len(keywords), 1)
-        movement_scores[movement] = score
+    for (movement, num_keywords), matches in zip(_MOVEMENT_GROUPS, movement_matches):
+        # Normalize keyword matches by number of keywords
+        movement_scores[movement] = matches / num_keywords
     
     return movement_scores
 
 
-def detect_influences(features: Dict[str, Any]) -> List[Dict[str, str]]:
+def detect_influences(features: TextFeatures) -> List[Dict[str, str]]:
     """Detect potential influences from authors, philosophies, and schools"""
-    text_lower = features["text_lower"]
+    group_matches = features.group_matches
     influences = []
     
     # Check for author influences
-    for author, keywords in INFLUENTIAL_AUTHORS.items():
-        matches = sum(1 for keyword in keywords if keyword in text_lower)
+    for author, matches in zip(_AUTHOR_NAMES, group_matches[_AUTHORS]):
         if matches >= 1:
             influences.append({
-                "name": author.title(),
+                "name": author,
                 "type": "author",
                 "confidence": "medium" if matches > 1 else "low"
             })
+            if len(influences) == MAX_INFLUENCES:
+                return influences
     
     # Check for philosophical influences
-    for philosophy, keywords in PHILOSOPHICAL_INFLUENCES.items():
-        matches = sum(1 for keyword in keywords if keyword in text_lower)
+    for philosophy, matches in zip(_PHILOSOPHY_NAMES, group_matches[_PHILOSOPHIES]):
         if matches >= 2:
             influences.append({
-                "name": philosophy.title(),
+                "name": philosophy,
                 "type": "philosophy",
                 "confidence": "medium" if matches > 2 else "low"
             })
+            if len(influences) == MAX_INFLUENCES:
+                return influences
     
-    # Limit to top 5 influences
-    return influences[:5]
+    return influences
+
+
+def _leading_sentences(text: str, limit: int) -> List[str]:
+    """Return up to limit stripped sentences longer than 10 chars, scanning only as far as needed"""
+    sentences = []
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group().strip()
+        if len(sentence) > 10:
+            sentences.append(sentence)
+            if len(sentences) >= limit:
+                break
+    return sentences
 
 
 def generate_summary(text: str, length: str = "medium") -> str:
     """Generate a summary of the text"""
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
+    # Medium summaries size themselves by sentence count, but never need to
+    # see more than _MEDIUM_SCAN_SENTENCES; short ones only need the first two
+    limit = 2 if length == "short" else _MEDIUM_SCAN_SENTENCES
+    sentences = _leading_sentences(text, limit)
     
     if not sentences:
         return "Text is too short to generate a meaningful summary."
@@ -167,7 +364,9 @@ def generate_summary(text: str, length: str = "medium") -> str:
 def analyze_literary_text(
     text: str, 
     language: str = "english",
-    summary_length: str = "medium"
+    summary_length: str = "medium",
+    *,
+    text_hash: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Perform comprehensive literary analysis on text.
@@ -176,9 +375,11 @@ def analyze_literary_text(
         text: Text to analyze
         language: Output language (english or spanish)
         summary_length: Length of summary (short or medium)
+        text_hash: Hash of text the caller already computed, used as the
+            cache key instead of digesting the text again
         
     Returns:
-        Dictionary with literary insights
+        Dictionary with literary insights, shared between callers - treat as read-only
     """
     # Validate input length
     if len(text) < 200:
@@ -187,8 +388,17 @@ def analyze_literary_text(
             "Please provide at least 200 characters for meaningful insights."
         )
     
+    digest = text_hash or text_digest(text)
+    key = (digest, language, summary_length)
+    cached = _literary_cache.get(key)
+    if cached is not None:
+        return cached
+    
     # Extract features
-    features = extract_text_features(text)
+    features = _features_cache.get(digest)
+    if features is None:
+        features = extract_text_features(text)
+        _features_cache.put(digest, features)
     
     # Generate summaries
     summary_short = generate_summary(text, "short")
@@ -196,7 +406,9 @@ def analyze_literary_text(
     
     # Detect literary movement
     movement_scores = detect_literary_movement(features)
-    top_movement = max(movement_scores.items(), key=lambda x: x[1])
+    # Top 3 movements, highest first (ties keep detector order)
+    top_movements = nlargest(3, movement_scores.items(), key=itemgetter(1))
+    top_movement = top_movements[0]
     
     # Select primary movement (only if score is meaningful)
     if top_movement[1] > 0.1:
@@ -219,9 +431,8 @@ def analyze_literary_text(
     
     # Determine aesthetic styles
     aesthetic_styles = []
-    # Get top 3 movements with meaningful scores
-    sorted_movements = sorted(movement_scores.items(), key=lambda x: x[1], reverse=True)
-    for movement, score in sorted_movements[:3]:
+    # Top 3 movements with meaningful scores
+    for movement, score in top_movements:
         if score > 0.05:
             confidence = "high" if score > 0.3 else "medium" if score > 0.15 else "low"
             aesthetic_styles.append({
@@ -237,22 +448,7 @@ def analyze_literary_text(
         })
     
     # Prepare disclaimer
-    disclaimers = {
-        "english": (
-            "This analysis is probabilistic and interpretive in nature. "
-            "The identified movements, influences, and styles are suggestions based on "
-            "computational text analysis and should not be considered definitive literary criticism. "
-            "Human expert analysis may yield different interpretations."
-        ),
-        "spanish": (
-            "Este análisis es de naturaleza probabilística e interpretativa. "
-            "Los movimientos, influencias y estilos identificados son sugerencias basadas en "
-            "análisis computacional de texto y no deben considerarse crítica literaria definitiva. "
-            "El análisis de expertos humanos puede producir interpretaciones diferentes."
-        )
-    }
-    
-    disclaimer = disclaimers.get(language, disclaimers["english"])
+    disclaimer = DISCLAIMERS.get(language, DISCLAIMERS["english"])
     
     # Translate fields if Spanish requested
     if language == "spanish":
@@ -260,7 +456,7 @@ def analyze_literary_text(
         aesthetic_styles = translate_styles_to_spanish(aesthetic_styles)
         influences = translate_influences_to_spanish(influences)
     
-    return {
+    result = {
         "summary_short": summary_short if summary_length in ["short", "medium"] else None,
         "summary_medium": summary_medium if summary_length == "medium" else None,
         "movement_or_tendency": primary_movement,
@@ -268,54 +464,28 @@ def analyze_literary_text(
         "aesthetic_styles": aesthetic_styles,
         "disclaimer": disclaimer
     }
+    _literary_cache.put(key, result)
+    return result
 
 
 def translate_movement_to_spanish(movement: str) -> str:
     """Translate movement names to Spanish"""
-    translations = {
-        "Romanticism": "Romanticismo",
-        "Realism": "Realismo",
-        "Modernism": "Modernismo",
-        "Postmodernism": "Posmodernismo",
-        "Symbolism": "Simbolismo",
-        "Naturalism": "Naturalismo",
-        "Surrealism": "Surrealismo",
-        "Classicism": "Clasicismo",
-        "Expressionism": "Expresionismo",
-        "Existentialism": "Existencialismo",
-        "Contemporary/Mixed": "Contemporáneo/Mixto",
-        "Contemporary": "Contemporáneo"
-    }
-    return translations.get(movement, movement)
+    return MOVEMENT_TRANSLATIONS_ES.get(movement, movement)
 
 
 def translate_styles_to_spanish(styles: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """Translate aesthetic styles to Spanish"""
-    confidence_map = {
-        "high": "alta",
-        "medium": "media",
-        "low": "baja"
-    }
-    
     translated = []
     for style in styles:
         translated.append({
             "style": translate_movement_to_spanish(style["style"]),
-            "confidence": confidence_map.get(style["confidence"], style["confidence"])
+            "confidence": CONFIDENCE_TRANSLATIONS_ES.get(style["confidence"], style["confidence"])
         })
     return translated
 
 
 def translate_influences_to_spanish(influences: List[Dict[str, str]]) -> List[Dict[str, str]]:
     """Translate influence types and rationale to Spanish"""
-    type_map = {
-        "author": "autor",
-        "philosophy": "filosofía",
-        "school": "escuela",
-        "historical": "histórico",
-        "cultural": "cultural"
-    }
-    
     translated = []
     for inf in influences:
         rationale = inf["rationale"].replace(
@@ -324,7 +494,7 @@ def translate_influences_to_spanish(influences: List[Dict[str, str]]) -> List[Di
         )
         translated.append({
             "name": inf["name"],
-            "type": type_map.get(inf["type"], inf["type"]),
+            "type": INFLUENCE_TYPE_TRANSLATIONS_ES.get(inf["type"], inf["type"]),
             "rationale": rationale
         })
     return translated
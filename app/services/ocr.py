@@ -1,17 +1,44 @@
 import pytesseract
 from PIL import Image
 import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Tuple
 import fitz  # PyMuPDF
 
+# Tesseract runs as a subprocess, so threads are enough to OCR pages in parallel
+OCR_WORKERS = min(4, os.cpu_count() or 1)
+
+def ocr_image_file(fp: BinaryIO) -> str:
+    # PIL decodes straight from the file object; no in-memory copy of the upload
+    image = Image.open(fp)
+    return pytesseract.image_to_string(image, lang='eng+spa')
+
 def ocr_image_bytes(image_bytes: bytes) -> str:
-    image = Image.open(io.BytesIO(image_bytes))
+    return ocr_image_file(io.BytesIO(image_bytes))
+
+def ocr_pdf_file(fp: BinaryIO) -> str:
+    # PyMuPDF only opens streams from bytes
+    return ocr_pdf_bytes(fp.read())
+
+def _ocr_rgb(page: Tuple[int, int, bytes]) -> str:
+    width, height, samples = page
+    # Wrap the raw pixmap samples directly instead of round-tripping through PNG
+    image = Image.frombytes("RGB", (width, height), samples)
     return pytesseract.image_to_string(image, lang='eng+spa')
 
 def ocr_pdf_bytes(pdf_bytes: bytes) -> str:
-    text = ""
-    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+    texts = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc, \
+            ThreadPoolExecutor(max_workers=OCR_WORKERS) as pool:
+        # Rasterize in order on this thread (PyMuPDF documents are not
+        # thread-safe) and keep only a few pages in flight to bound memory
+        pending = deque()
         for page in doc:
-            pix = page.get_pixmap(dpi=300)
-            img_bytes = pix.tobytes("png")
-            text += pytesseract.image_to_string(Image.open(io.BytesIO(img_bytes)), lang='eng+spa')
-    return text
\ No newline at end of file
+            pix = page.get_pixmap(dpi=300, alpha=False)
+            pending.append(pool.submit(_ocr_rgb, (pix.width, pix.height, pix.samples)))
+            if len(pending) >= OCR_WORKERS * 2:
+                texts.append(pending.popleft().result())
+        texts.extend(future.result() for future in pending)
+    return "".join(texts)
@@ -1,7 +1,7 @@
 from fpdf import FPDF
 from datetime import datetime
 
-def generate_pdf_report(text: str, top_words, sentiment, output_path):
+def _build_report(text: str, top_words, sentiment) -> FPDF:
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", 'B', 16)
@@ -20,7 +20,11 @@ def generate_pdf_report(text: str, top_words, sentiment, output_path):
     pdf.set_font("Arial", 'B', 14)
     pdf.cell(0, 10, "Palabras más frecuentes", ln=True)
     pdf.set_font("Arial", '', 12)
-    for word, count in top_words:
-        pdf.cell(0, 10, f"{word}: {count}", ln=True)
+    # One multi-line cell lays out the whole list instead of one cell per word
+    if top_words:
+        pdf.multi_cell(0, 10, "\n".join(f"{word}: {count}" for word, count in top_words))
+
+    return pdf
 
-    pdf.output(output_path)
\ No newline at end of file
+def generate_pdf_report(text: str, top_words, sentiment, output_path):
+    _build_report(text, top_words, sentiment).output(output_path)
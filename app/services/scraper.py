@@ -1,23 +1,75 @@
 import httpx
+import httpcore
+import anyio.to_thread
 from bs4 import BeautifulSoup
 from readability import Document
 import ipaddress
+import socket
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+import time
+from functools import lru_cache
 from urllib.parse import urlparse
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Define private IP ranges to block for SSRF protection
-BLOCKED_IP_RANGES = [
-    ipaddress.ip_network('127.0.0.0/8'),      # Loopback
-    ipaddress.ip_network('10.0.0.0/8'),       # Private Class A
-    ipaddress.ip_network('172.16.0.0/12'),    # Private Class B
-    ipaddress.ip_network('192.168.0.0/16'),   # Private Class C
-    ipaddress.ip_network('169.254.0.0/16'),   # Link-local
-    ipaddress.ip_network('::1/128'),          # IPv6 loopback
-    ipaddress.ip_network('fc00::/7'),         # IPv6 private
-    ipaddress.ip_network('fe80::/10'),        # IPv6 link-local
-]
+# Try to import selectolax for fast, C-backed HTML parsing (optional)
+try:
+    # selectolax 1.0 dropped selectolax.parser; lexbor is the current backend
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+    logger.info("selectolax not installed. HTML text extraction will use BeautifulSoup.")
+
+# Shared async HTTP client (connection pooling across requests); created at
+# application startup, see open_async_client
+_async_client: Optional[httpx.AsyncClient] = None
+
+# Elements that never hold article text
+BOILERPLATE_TAGS = ["script", "style", "nav", "footer", "header"]
+
+# Elements whose content is code or fallback markup rather than readable text
+NON_TEXT_TAGS = ["script", "style", "noscript"]
+
+# Connection pool limits for URL fetches
+FETCH_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# URL schemes the scraper may fetch
+ALLOWED_SCHEMES = frozenset({"http", "https"})
+
+
+def is_blocked_ip(ip_obj) -> bool:
+    """True for addresses that must not be fetched (SSRF protection)"""
+    # ipaddress classifies against the IANA special-purpose registries, which
+    # covers loopback, RFC 1918/ULA private, link-local and more
+    return (
+        ip_obj.is_private
+        or ip_obj.is_loopback
+        or ip_obj.is_link_local
+        or ip_obj.is_multicast
+        or ip_obj.is_reserved
+        or ip_obj.is_unspecified
+    )
+
+
+# Seconds a resolved address may be reused before it is looked up again
+DNS_CACHE_TTL = 30
+
+
+@lru_cache(maxsize=1024)
+def _resolve(hostname: str, bucket: int) -> str:
+    """Resolve hostname; bucket (time // DNS_CACHE_TTL) expires cached answers"""
+    return socket.gethostbyname(hostname)
+
+
+def _parse_ip_literal(hostname: str):
+    """Return the address if hostname is an IPv4/IPv6 literal, else None"""
+    try:
+        return ipaddress.ip_address(hostname)
+    except ValueError:
+        return None
 
 
 def is_safe_url(url: str) -> bool:
@@ -34,7 +86,7 @@ def is_safe_url(url: str) -> bool:
         parsed = urlparse(url)
         
         # Check scheme
-        if parsed.scheme not in ['http', 'https']:
+        if parsed.scheme not in ALLOWED_SCHEMES:
             logger.warning(f"Blocked URL with invalid scheme: {url}")
             return False
         
@@ -44,18 +96,19 @@ def is_safe_url(url: str) -> bool:
             logger.warning(f"Blocked URL with no hostname: {url}")
             return False
         
-        # Try to resolve IP
+        # Try to resolve IP (IP-literal hosts are checked as-is, without DNS)
         try:
-            import socket
-            ip_address = socket.gethostbyname(hostname)
-            ip_obj = ipaddress.ip_address(ip_address)
+            ip_address = hostname
+            ip_obj = _parse_ip_literal(hostname)
+            if ip_obj is None:
+                ip_address = _resolve(hostname, int(time.time() // DNS_CACHE_TTL))
+                ip_obj = ipaddress.ip_address(ip_address)
+            
+            # Check if IP is in a blocked category
+            if is_blocked_ip(ip_obj):
+                logger.warning(f"Blocked URL with private IP: {url} -> {ip_address}")
+                return False
             
-            # Check if IP is in blocked ranges
-            for blocked_range in BLOCKED_IP_RANGES:
-                if ip_obj in blocked_range:
-                    logger.warning(f"Blocked URL with private IP: {url} -> {ip_address}")
-                    return False
-                    
         except (socket.gaierror, ValueError) as e:
             logger.warning(f"Could not resolve hostname for {url}: {e}")
             return False
@@ -67,6 +120,105 @@ def is_safe_url(url: str) -> bool:
         return False
 
 
+def _check_request_url(request: httpx.Request) -> None:
+    """Event hook: re-check every request a client sends, including redirect hops"""
+    if not is_safe_url(str(request.url)):
+        raise ValueError(f"URL blocked for security reasons: {request.url}")
+
+
+async def _check_request_url_async(request: httpx.Request) -> None:
+    """Async event hook variant; resolves the hostname off the event loop"""
+    if not await anyio.to_thread.run_sync(is_safe_url, str(request.url)):
+        raise ValueError(f"URL blocked for security reasons: {request.url}")
+
+
+def _checked_address(hostname: str) -> str:
+    """Resolve hostname and return its address, raising ValueError if blocked"""
+    ip_obj = _parse_ip_literal(hostname)
+    if ip_obj is None:
+        try:
+            ip_obj = ipaddress.ip_address(_resolve(hostname, int(time.time() // DNS_CACHE_TTL)))
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(f"Could not resolve {hostname}: {e}")
+    if is_blocked_ip(ip_obj):
+        logger.warning(f"Blocked connection to private IP: {hostname} -> {ip_obj}")
+        raise ValueError(f"URL blocked for security reasons: {hostname}")
+    return str(ip_obj)
+
+
+class _CheckedBackend(httpcore.NetworkBackend):
+    """Network backend that connects to the SSRF-checked address of each host
+    
+    The URL check in the request hook runs before httpx opens a connection;
+    resolving again at connect time would let a DNS answer that changed in
+    between (DNS rebinding) reach a private address. TLS still verifies the
+    original hostname.
+    """
+    
+    def __init__(self, backend: Optional[httpcore.NetworkBackend] = None):
+        self._backend = backend or httpcore.SyncBackend()
+    
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        return self._backend.connect_tcp(
+            _checked_address(host), port,
+            timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+    
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise ValueError("Unix socket connections are not allowed")
+    
+    def sleep(self, seconds):
+        self._backend.sleep(seconds)
+
+
+class _CheckedAsyncBackend(httpcore.AsyncNetworkBackend):
+    """Async variant of _CheckedBackend; resolves off the event loop"""
+    
+    def __init__(self, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._backend = backend or httpcore.AnyIOBackend()
+    
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        address = await anyio.to_thread.run_sync(_checked_address, host)
+        return await self._backend.connect_tcp(
+            address, port,
+            timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+    
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        raise ValueError("Unix socket connections are not allowed")
+    
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+
+def _checked_transport(backend: Optional[httpcore.NetworkBackend] = None) -> httpx.HTTPTransport:
+    """HTTP transport whose connections go through _CheckedBackend"""
+    transport = httpx.HTTPTransport(limits=FETCH_LIMITS)
+    # httpx has no option for a custom network backend, so swap in an
+    # equivalent connection pool that uses one
+    transport._pool = httpcore.ConnectionPool(
+        ssl_context=httpx.create_ssl_context(),
+        max_connections=FETCH_LIMITS.max_connections,
+        max_keepalive_connections=FETCH_LIMITS.max_keepalive_connections,
+        keepalive_expiry=FETCH_LIMITS.keepalive_expiry,
+        network_backend=_CheckedBackend(backend)
+    )
+    return transport
+
+
+def _checked_async_transport(backend: Optional[httpcore.AsyncNetworkBackend] = None) -> httpx.AsyncHTTPTransport:
+    """Async HTTP transport whose connections go through _CheckedAsyncBackend"""
+    transport = httpx.AsyncHTTPTransport(limits=FETCH_LIMITS)
+    transport._pool = httpcore.AsyncConnectionPool(
+        ssl_context=httpx.create_ssl_context(),
+        max_connections=FETCH_LIMITS.max_connections,
+        max_keepalive_connections=FETCH_LIMITS.max_keepalive_connections,
+        keepalive_expiry=FETCH_LIMITS.keepalive_expiry,
+        network_backend=_CheckedAsyncBackend(backend)
+    )
+    return transport
+
+
 def fetch_article_text(url: str, timeout: int = 10) -> str:
     """
     Fetch and extract main text from a URL with SSRF protection
@@ -82,13 +234,15 @@ def fetch_article_text(url: str, timeout: int = 10) -> str:
         ValueError: If URL is unsafe or invalid
         httpx.HTTPError: If request fails
     """
-    # SSRF protection
-    if not is_safe_url(url):
-        raise ValueError(f"URL blocked for security reasons: {url}")
-    
-    # Fetch the URL
+    # Fetch the URL (SSRF protection runs as a request hook, so redirect
+    # targets are checked too, and again on the address actually connected to)
     try:
-        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
+        with httpx.Client(
+            timeout=timeout,
+            follow_redirects=True,
+            event_hooks={"request": [_check_request_url]},
+            transport=_checked_transport()
+        ) as client:
             response = client.get(url)
             response.raise_for_status()
             html = response.text
@@ -97,15 +251,76 @@ def fetch_article_text(url: str, timeout: int = 10) -> str:
     except httpx.HTTPError as e:
         raise ValueError(f"Failed to fetch URL: {str(e)}")
     
+    return extract_article_text(html)
+
+
+def _new_async_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Build the pooled async client used for every URL fetch"""
+    if transport is None:
+        transport = _checked_async_transport()
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        event_hooks={"request": [_check_request_url_async]},
+        # The client is shared by all requests, so it must not keep cookies:
+        # a Set-Cookie from one user's fetch would be sent on everyone's
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        transport=transport
+    )
+
+
+def open_async_client() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it if needed"""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = _new_async_client()
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared async HTTP client (application shutdown)"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def fetch_article_text_async(url: str, timeout: int = 10) -> str:
+    """
+    Async variant of fetch_article_text using the shared client
+    
+    Args:
+        url: URL to fetch
+        timeout: Request timeout in seconds
+        
+    Returns:
+        Extracted text content
+        
+    Raises:
+        ValueError: If URL is unsafe, invalid or could not be fetched
+    """
+    try:
+        response = await open_async_client().get(url, timeout=timeout)
+        response.raise_for_status()
+        html = response.text
+    except httpx.TimeoutException:
+        raise ValueError(f"Request timed out after {timeout} seconds")
+    except httpx.HTTPError as e:
+        raise ValueError(f"Failed to fetch URL: {str(e)}")
+    
+    # Parsing is CPU-bound; keep it off the event loop
+    return await anyio.to_thread.run_sync(extract_article_text, html)
+
+
+def extract_article_text(html: str) -> str:
+    """Extract the main article text (with title) from a fetched HTML page"""
     # Try readability first for better extraction
     try:
         doc = Document(html)
         title = doc.title()
         content = doc.summary()
         
-        # Parse with BeautifulSoup to extract text
-        soup = BeautifulSoup(content, 'html.parser')
-        text = soup.get_text(separator='\n', strip=True)
+        # Extract text from the cleaned-up article HTML
+        text = html_to_text(content)
         
         # Add title if available
         if title:
@@ -117,21 +332,67 @@ def fetch_article_text(url: str, timeout: int = 10) -> str:
         logger.warning(f"Readability extraction failed: {e}. Falling back to basic extraction.")
         
         # Fallback to basic extraction
-        soup = BeautifulSoup(html, 'html.parser')
+        return extract_main_text(html)
+
+
+def html_to_text(html: str) -> str:
+    """Return the text of an HTML document, one stripped text node per line"""
+    if SELECTOLAX_AVAILABLE:
+        tree = LexborHTMLParser(html)
+        for node in tree.css(",".join(NON_TEXT_TAGS)):
+            node.decompose()
+        root = tree.root
+        if root is None:
+            return ""
+        text = root.text(separator='\n', strip=True)
+        return '\n'.join(line for line in text.split('\n') if line)
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(NON_TEXT_TAGS):
+        tag.decompose()
+    return soup.get_text(separator='\n', strip=True)
+
+
+def extract_main_text(html: str) -> str:
+    """Extract paragraph text from the article/main element of a raw HTML page"""
+    if SELECTOLAX_AVAILABLE:
+        tree = LexborHTMLParser(html)
         
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
+        # Remove script, style and page chrome elements
+        for node in tree.css(",".join(BOILERPLATE_TAGS)):
+            node.decompose()
         
         # Try to find article or main content
-        article = soup.find('article') or soup.find('main') or soup
+        article = tree.css_first('article') or tree.css_first('main') or tree.root
+        if article is None:
+            return ""
         
         # Get text from paragraphs
-        paragraphs = article.find_all('p')
-        text = '\n'.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+        text = '\n'.join(t for t in (p.text(strip=True) for p in article.css('p')) if t)
         
         if not text:
             # If no paragraphs, get all text
-            text = soup.get_text(separator='\n', strip=True)
+            text = '\n'.join(
+                line for line in tree.root.text(separator='\n', strip=True).split('\n') if line
+            )
         
         return text
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove script and style elements
+    for script in soup(BOILERPLATE_TAGS):
+        script.decompose()
+    
+    # Try to find article or main content
+    article = soup.find('article') or soup.find('main') or soup
+    
+    # Get text from paragraphs
+    paragraphs = article.find_all('p')
+    text = '\n'.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
+    
+    if not text:
+        # If no paragraphs, get all text
+        text = soup.get_text(separator='\n', strip=True)
+    
+    return text
@@ -1,12 +1,17 @@
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import logging
+import os
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
 # Initialize VADER analyzer
 vader_analyzer = SentimentIntensityAnalyzer()
 
+# Whether the smart mode model runs with int8 dynamic quantization
+SMART_MODEL_QUANTIZED = False
+
 # Try to import transformers for smart mode (optional)
 try:
     from transformers import pipeline
@@ -23,6 +28,14 @@ try:
             model="distilbert-base-uncased-finetuned-sst-2-english",
             device=device
         )
+        
+        # Optionally quantize the linear layers to int8 for faster CPU inference
+        if device == -1 and os.getenv("SENTIMENT_INT8") == "1":
+            smart_sentiment_pipeline.model = torch.quantization.quantize_dynamic(
+                smart_sentiment_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            SMART_MODEL_QUANTIZED = True
+            logger.info("Smart mode model quantized to int8 (SENTIMENT_INT8=1)")
         SMART_MODE_AVAILABLE = True
         logger.info("Smart mode (transformer-based) sentiment analysis loaded successfully")
     except Exception as e:
@@ -35,6 +48,11 @@ except ImportError:
     logger.info("Transformers not installed. Smart mode will use fast mode fallback.")
 
 
+# Texts up to this length have their VADER scores memoized; longer ones are
+# rarely repeated and would be kept alive by the cache
+SENTIMENT_CACHE_MAX_CHARS = 2048
+
+
 def analyze_sentiment_fast(text: str) -> Dict[str, Any]:
     """
     Fast sentiment analysis using VADER (lexicon-based)
@@ -45,6 +63,19 @@ def analyze_sentiment_fast(text: str) -> Dict[str, Any]:
     Returns:
         Dictionary with sentiment scores and label
     """
+    if len(text) <= SENTIMENT_CACHE_MAX_CHARS:
+        # VADER is deterministic; copy so callers can't alter the cached entry
+        return dict(_vader_sentiment_cached(text))
+    return _vader_sentiment(text)
+
+
+@lru_cache(maxsize=4096)
+def _vader_sentiment_cached(text: str) -> Dict[str, Any]:
+    return _vader_sentiment(text)
+
+
+def _vader_sentiment(text: str) -> Dict[str, Any]:
+    """Score text with VADER and map the compound score to a label"""
     scores = vader_analyzer.polarity_scores(text)
     
     # Determine label based on compound score
@@ -67,6 +98,50 @@ def analyze_sentiment_fast(text: str) -> Dict[str, Any]:
     }
 
 
+# Token budget per model input, overlap between consecutive chunks, and how
+# many chunks go through the model per forward pass
+SMART_MAX_TOKENS = 512
+SMART_STRIDE = 64
+SMART_BATCH_SIZE = 16
+# Upper bound on chunks scored per document so very long inputs stay bounded
+SMART_MAX_CHUNKS = 32
+
+
+def _classify_smart(text: str) -> Tuple[str, float]:
+    """Classify text in overlapping token windows and average the class probabilities"""
+    tokenizer = smart_sentiment_pipeline.tokenizer
+    model = smart_sentiment_pipeline.model
+    
+    # Tokenize once; overflowing tokens become extra (overlapping) chunks
+    encoded = tokenizer(
+        text,
+        max_length=SMART_MAX_TOKENS,
+        stride=SMART_STRIDE,
+        truncation=True,
+        padding=True,
+        return_overflowing_tokens=True,
+        return_tensors="pt"
+    )
+    inputs = {
+        name: tensor[:SMART_MAX_CHUNKS].to(model.device)
+        for name, tensor in encoded.items()
+        if name in ("input_ids", "attention_mask")
+    }
+    num_chunks = inputs["input_ids"].shape[0]
+    
+    with torch.inference_mode():
+        probabilities = torch.cat([
+            torch.softmax(
+                model(**{name: tensor[start:start + SMART_BATCH_SIZE] for name, tensor in inputs.items()}).logits,
+                dim=-1
+            )
+            for start in range(0, num_chunks, SMART_BATCH_SIZE)
+        ]).mean(dim=0)
+    
+    score, index = probabilities.max(dim=0)
+    return model.config.id2label[int(index)], float(score)
+
+
 def analyze_sentiment_smart(text: str) -> Dict[str, Any]:
     """
     Smart sentiment analysis using transformer model
@@ -82,17 +157,11 @@ def analyze_sentiment_smart(text: str) -> Dict[str, Any]:
         return analyze_sentiment_fast(text)
     
     try:
-        # Truncate text if too long (transformers have token limits)
-        max_length = 512
-        if len(text) > max_length:
-            text = text[:max_length]
-        
-        # Get prediction
-        result = smart_sentiment_pipeline(text)[0]
+        # Get prediction over the whole document (token-budgeted chunks)
+        label, score = _classify_smart(text)
         
         # Convert label to standardized format
-        label = result['label'].lower()
-        score = result['score']
+        label = label.lower()
         
         # Map labels (different models may use different labels)
         if label in ['positive', 'pos', '1']:
@@ -119,6 +188,13 @@ def analyze_sentiment_smart(text: str) -> Dict[str, Any]:
         return analyze_sentiment_fast(text)
 
 
+# Analyzer per mode; unknown modes use fast mode
+_MODES = {
+    "fast": analyze_sentiment_fast,
+    "smart": analyze_sentiment_smart
+}
+
+
 def analyze_sentiment(text: str, mode: str = "fast") -> Dict[str, Any]:
     """
     Analyze sentiment using specified mode
@@ -130,14 +206,23 @@ def analyze_sentiment(text: str, mode: str = "fast") -> Dict[str, Any]:
     Returns:
         Dictionary with sentiment analysis results
     """
-    if mode == "smart":
-        return analyze_sentiment_smart(text)
-    else:
-        return analyze_sentiment_fast(text)
+    return _MODES.get(mode, analyze_sentiment_fast)(text)
+
+
+def warmup_models() -> None:
+    """Run each loaded sentiment model once so the first request doesn't pay one-time setup costs"""
+    analyze_sentiment_fast("warmup")
+    if SMART_MODE_AVAILABLE and smart_sentiment_pipeline is not None:
+        try:
+            _classify_smart("warmup")
+        except Exception as e:
+            logger.warning(f"Smart mode warmup failed: {e}")
 
 
 def get_model_info(mode: str) -> str:
     """Get information about the model being used"""
     if mode == "smart" and SMART_MODE_AVAILABLE:
+        if SMART_MODEL_QUANTIZED:
+            return "distilbert-base-uncased-finetuned-sst-2-english (int8)"
         return "distilbert-base-uncased-finetuned-sst-2-english"
     return "VADER (vaderSentiment)"
@@ -1,13 +1,31 @@
+import atexit
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_session_factory, bulk_insert_records, _set_sqlite_pragmas
 
-# Create test database
-TEST_DATABASE_URL = "sqlite:///./test_literary_analysis.db"
-test_engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+# Create test database: a throwaway SQLite file configured like the app's
+# engine (WAL, busy timeout, connection pool), so every session, including
+# concurrent background writers, gets its own connection and transaction.
+# Each pytest-xdist worker is its own process and creates its own file
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="litapi-test-")
+atexit.register(shutil.rmtree, _TEST_DB_DIR, ignore_errors=True)
+TEST_DATABASE_URL = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test.db')}"
+test_engine = create_engine(
+    TEST_DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": 30},
+    poolclass=QueuePool
+)
+event.listen(test_engine, "connect", _set_sqlite_pragmas)
 TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
 
@@ -20,18 +38,119 @@ def override_get_db():
         db.close()
 
 
-@pytest.fixture(scope="function")
+def override_get_session_factory():
+    """Override background-write session factory for testing"""
+    return TestSessionLocal
+
+
+@pytest.fixture(scope="session")
 def test_db():
-    """Create test database and drop after test"""
+    """Create test database once per session and drop it at the end"""
     Base.metadata.create_all(bind=test_engine)
     yield
     Base.metadata.drop_all(bind=test_engine)
+    test_engine.dispose()
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def client(test_db):
-    """Create test client with test database"""
+    """Create one test client (one app startup/shutdown) for the whole session"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = override_get_session_factory
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+
+# Synthetic payloads that take the same analysis paths as the API tests
+# (TF-IDF keywords, literary detectors and summaries) without matching any
+# test's text, so tests still exercise uncached analysis
+WARMUP_TEXT_PAYLOAD = {
+    "text": "Warmup run. It primes the analysis pipeline. Results are discarded.",
+    "mode": "fast"
+}
+WARMUP_LITERARY_PAYLOAD = {
+    "text": (
+        "The wanderer crossed the silent valley at dawn, and the mountains rose in sublime "
+        "grandeur above the river. Memory and longing shaped every step of the journey. "
+        "Nature seemed to answer the restless heart with beauty, solitude and imagination. "
+        "By nightfall the stars held the quiet promise of freedom."
+    ),
+    "language": "english",
+    "summary_length": "medium"
+}
+
+
+@pytest.fixture(scope="session")
+def warmup(client):
+    """Run one text and one literary analysis so first-call setup isn't billed to a test
+
+    Set LITAPI_WARMUP=0 to skip. The rows it stores are removed by reset_db.
+    """
+    if os.environ.get("LITAPI_WARMUP", "1") == "0":
+        return
+    client.post("/v1/analyze/text", json=WARMUP_TEXT_PAYLOAD)
+    client.post("/v1/analyze/literary", json=WARMUP_LITERARY_PAYLOAD)
+
+
+@pytest.fixture
+def asgi_transport(client):
+    """In-process ASGI transport for async tests (relies on client's startup and overrides)"""
+    return httpx.ASGITransport(app=app)
+
+
+# Stored result for seeded rows, shaped like a fast-mode text analysis
+SEED_RESULT = {
+    "word_count": 2,
+    "sentiment": {
+        "polarity_label": "neutral",
+        "polarity_score": 0.0,
+        "compound": 0.0,
+        "positive": 0.0,
+        "negative": 0.0,
+        "neutral": 1.0,
+        "confidence": None
+    },
+    "keywords": ["seeded"],
+    "top_words": [["seeded", 1]]
+}
+
+
+@pytest.fixture
+def seed_analyses(client):
+    """Factory that inserts n canned analysis rows directly, bypassing HTTP and NLP"""
+    def seed(n, source_type="text"):
+        now = datetime.utcnow()
+        rows = [
+            dict(
+                id=str(uuid.uuid4()),
+                created_at=now - timedelta(seconds=i),
+                source_type=source_type,
+                raw_input_hash=f"{i:064x}",
+                url=None,
+                filename=None,
+                extracted_text=f"Seeded text {i}",
+                mode="fast",
+                model_version="VADER (vaderSentiment)",
+                result=SEED_RESULT
+            )
+            for i in range(n)
+        ]
+        db = TestSessionLocal()
+        try:
+            bulk_insert_records(db, rows)
+        finally:
+            db.close()
+        return [row["id"] for row in rows]
+    return seed
+
+
+@pytest.fixture(autouse=True)
+def reset_db(request):
+    """Empty all tables before each test that uses the API client"""
+    if "client" in request.fixturenames:
+        request.getfixturevalue("warmup")
+        with test_engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+    yield
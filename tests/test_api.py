@@ -1,5 +1,12 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+import httpx
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import text
+from tests.conftest import SEED_RESULT, test_engine
 
 
 def test_health_check(client: TestClient):
@@ -77,24 +84,67 @@ def test_retrieve_analysis_by_id(client: TestClient):
     assert "result" in data
 
 
+def test_retrieve_analysis_not_modified(client: TestClient):
+    """Test conditional retrieval with the analysis ETag"""
+    create_response = client.post("/v1/analyze/text", json={"text": "This is a test text for caching.", "mode": "fast"})
+    assert create_response.status_code == 200
+    analysis_id = create_response.json()["analysis_id"]
+    
+    first = client.get(f"/v1/analyses/{analysis_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    
+    # Same ETag: no body is sent
+    second = client.get(f"/v1/analyses/{analysis_id}", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+    
+    # Different ETag: full response
+    third = client.get(f"/v1/analyses/{analysis_id}", headers={"If-None-Match": '"stale"'})
+    assert third.status_code == 200
+    assert third.json()["analysis_id"] == analysis_id
+
+
+def test_retrieve_legacy_uncompressed_analysis(client: TestClient):
+    """Test that rows stored as plain JSON text (before compression) still load"""
+    analysis_id = str(uuid.uuid4())
+    with test_engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO analyses (id, created_at, source_type, mode, result) "
+                "VALUES (:id, :created_at, 'text', 'fast', :result)"
+            ),
+            {"id": analysis_id, "created_at": datetime.utcnow(), "result": json.dumps(SEED_RESULT)}
+        )
+    
+    response = client.get(f"/v1/analyses/{analysis_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["analysis_id"] == analysis_id
+    assert data["result"]["keywords"] == SEED_RESULT["keywords"]
+    assert data["result"]["sentiment"]["polarity_label"] == "neutral"
+
+
 def test_retrieve_nonexistent_analysis(client: TestClient):
     """Test retrieving a non-existent analysis"""
     response = client.get("/v1/analyses/nonexistent-id-12345")
     assert response.status_code == 404
 
 
-def test_list_analyses(client: TestClient):
+@pytest.mark.asyncio
+async def test_list_analyses(asgi_transport: httpx.ASGITransport):
     """Test listing analyses"""
-    # Create a few analyses
-    for i in range(3):
-        payload = {
-            "text": f"Test text number {i}",
-            "mode": "fast"
-        }
-        client.post("/v1/analyze/text", json=payload)
-    
-    # List all analyses
-    response = client.get("/v1/analyses")
+    async with httpx.AsyncClient(transport=asgi_transport, base_url="http://test") as ac:
+        # Create a few analyses concurrently
+        responses = await asyncio.gather(*(
+            ac.post("/v1/analyze/text", json={"text": f"Test text number {i}", "mode": "fast"})
+            for i in range(3)
+        ))
+        assert all(r.status_code == 200 for r in responses)
+        
+        # List all analyses
+        response = await ac.get("/v1/analyses")
     assert response.status_code == 200
     
     data = response.json()
@@ -104,10 +154,10 @@ def test_list_analyses(client: TestClient):
     assert len(data["analyses"]) == 3
 
 
-def test_list_analyses_with_filters(client: TestClient):
+def test_list_analyses_with_filters(client: TestClient, seed_analyses):
     """Test listing analyses with filters"""
-    # Create some analyses
-    client.post("/v1/analyze/text", json={"text": "Test text", "mode": "fast"})
+    seed_analyses(1)
+    seed_analyses(2, source_type="url")
     
     # List with filter
     response = client.get("/v1/analyses?source_type=text&limit=5&offset=0")
@@ -116,13 +166,13 @@ def test_list_analyses_with_filters(client: TestClient):
     data = response.json()
     assert data["limit"] == 5
     assert data["offset"] == 0
+    assert data["total"] == 1
+    assert all(a["source_type"] == "text" for a in data["analyses"])
 
 
-def test_list_analyses_pagination(client: TestClient):
+def test_list_analyses_pagination(client: TestClient, seed_analyses):
     """Test pagination in list analyses"""
-    # Create multiple analyses
-    for i in range(5):
-        client.post("/v1/analyze/text", json={"text": f"Text {i}", "mode": "fast"})
+    seed_analyses(5)
     
     # Get first page
     response1 = client.get("/v1/analyses?limit=2&offset=0")
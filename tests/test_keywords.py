@@ -0,0 +1,19 @@
+"""
+Tests for keyword extraction
+"""
+from app.services.keywords import extract_keywords_tfidf
+
+
+def test_two_sentence_text_ranked_by_tfidf():
+    """Two-sentence texts are ranked by mean TF-IDF, not raw term frequency"""
+    text = (
+        "The sea was calm, and the sea was silver under the moon, so the sea seemed "
+        "to sleep beside the lighthouse. The lighthouse keeper watched the sea and "
+        "the lighthouse until the keeper finally slept."
+    )
+    
+    keywords = extract_keywords_tfidf(text, max_keywords=5)
+    
+    # 'lighthouse keeper' and 'keeper' score equally, so only their set is fixed
+    assert keywords[:2] == ["sea", "lighthouse"]
+    assert set(keywords) == {"sea", "lighthouse", "lighthouse keeper", "keeper", "finally slept"}
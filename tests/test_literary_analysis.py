@@ -278,6 +278,28 @@ def test_literary_analysis_database_persistence(client: TestClient):
     # This test confirms the analysis was created and returned with an ID
 
 
+def test_literary_analysis_repeated_text_gets_new_id(client: TestClient):
+    """Test that repeating a request reuses the insights but mints a new analysis"""
+    payload = {
+        "text": (
+            "The soul wanders through nature, guided by emotion and imagination. "
+            "Every heartbeat echoes the sublime passion of the individual spirit. " * 3
+        ),
+        "language": "english",
+        "summary_length": "medium"
+    }
+    
+    first = client.post("/v1/analyze/literary", json=payload)
+    second = client.post("/v1/analyze/literary", json=payload)
+    assert first.status_code == 200
+    assert second.status_code == 200
+    
+    first_data = first.json()
+    second_data = second.json()
+    assert first_data["analysis_id"] != second_data["analysis_id"]
+    assert first_data["insights"] == second_data["insights"]
+
+
 def test_literary_analysis_multiple_aesthetic_styles(client: TestClient):
     """Test detection of multiple aesthetic styles in mixed text"""
     payload = {
@@ -0,0 +1,38 @@
+"""
+Tests for HTML text extraction
+"""
+import pytest
+from app.services import scraper
+
+SAMPLE_HTML = """
+<html>
+  <head><title>Sample</title><style>p { color: red; }</style></head>
+  <body>
+    <script>var tracking = "sad terrible awful";</script>
+    <noscript>Please enable JavaScript.</noscript>
+    <nav>Home</nav>
+    <article>
+      <p>The river ran <b>bright</b> through the valley.</p>
+      <p>   </p>
+      <p>Spring returned at last.</p>
+    </article>
+    <footer>Copyright</footer>
+  </body>
+</html>
+"""
+
+
+@pytest.mark.parametrize("extract", [scraper.html_to_text, scraper.extract_main_text])
+def test_selectolax_matches_beautifulsoup(monkeypatch, extract):
+    """Both parser backends extract the same text and drop scripts and styles"""
+    pytest.importorskip("selectolax.lexbor")
+    
+    monkeypatch.setattr(scraper, "SELECTOLAX_AVAILABLE", True)
+    fast = extract(SAMPLE_HTML)
+    monkeypatch.setattr(scraper, "SELECTOLAX_AVAILABLE", False)
+    fallback = extract(SAMPLE_HTML)
+    
+    assert fast == fallback
+    assert "tracking" not in fast
+    assert "color" not in fast
+    assert "The river ran" in fast
@@ -1,7 +1,38 @@
+import asyncio
+import ipaddress
+import socket
+import httpcore
+import httpx
 import pytest
-from unittest.mock import patch
+from app.services import scraper
 from app.services.scraper import is_safe_url
 
+# Deterministic DNS answers so SSRF tests never touch the network
+FAKE_DNS = {
+    "localhost": "127.0.0.1",
+    "example.com": "93.184.216.34",
+}
+
+
+def fake_gethostbyname(hostname):
+    """Resolve like socket.gethostbyname (IPv4 only) without network access"""
+    try:
+        ip = ipaddress.ip_address(hostname)
+    except ValueError:
+        return FAKE_DNS.get(hostname, "93.184.216.34")
+    if ip.version != 4:
+        raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+    return hostname
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    """Patch the resolver used by is_safe_url and drop any cached answers"""
+    monkeypatch.setattr(socket, "gethostbyname", fake_gethostbyname)
+    scraper._resolve.cache_clear()
+    yield
+    scraper._resolve.cache_clear()
+
 
 def test_ssrf_localhost_blocked():
     """Test that localhost is blocked"""
@@ -28,12 +59,9 @@ def test_ssrf_private_ips_blocked():
     assert is_safe_url("http://169.254.0.1/api") == False
 
 
-@patch('socket.gethostbyname')
-def test_ssrf_public_urls_allowed(mock_gethostbyname):
+def test_ssrf_public_urls_allowed():
     """Test that public URLs are allowed"""
-    # Mock DNS resolution to return a public IP
-    mock_gethostbyname.return_value = "93.184.216.34"  # example.com IP
-    
+    # fake_dns resolves example.com to its public IP
     assert is_safe_url("http://example.com/api") == True
     assert is_safe_url("https://example.com/api") == True
 
@@ -50,6 +78,96 @@ def test_ssrf_ipv6_localhost_blocked():
     assert is_safe_url("http://[::1]/api") == False
 
 
+def test_ssrf_ip_literals_skip_dns(monkeypatch):
+    """Test that IP-literal hosts are checked without a DNS lookup"""
+    def no_dns(hostname):
+        raise AssertionError(f"unexpected DNS lookup for {hostname}")
+    monkeypatch.setattr(socket, "gethostbyname", no_dns)
+    
+    assert is_safe_url("http://10.0.0.1/api") == False
+    assert is_safe_url("http://[::1]/api") == False
+    assert is_safe_url("http://93.184.216.34/api") == True
+    assert is_safe_url("http://[2606:2800:220:1:248:1893:25c8:1946]/api") == True
+
+
+class RecordingBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that records connect targets instead of connecting"""
+    
+    def __init__(self):
+        self.connected = []
+    
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.connected.append(host)
+        raise httpcore.ConnectError("no network in tests")
+
+
+def scrape_with_backend(monkeypatch, backend, url):
+    """Fetch url through the shared-client code path using backend for sockets"""
+    async def scrape():
+        client = scraper._new_async_client(transport=scraper._checked_async_transport(backend))
+        monkeypatch.setattr(scraper, "_async_client", client)
+        try:
+            await scraper.fetch_article_text_async(url)
+        finally:
+            await client.aclose()
+    asyncio.run(scrape())
+
+
+def test_fetch_connects_to_checked_address(monkeypatch):
+    """Test that the connection goes to the address the SSRF check resolved"""
+    backend = RecordingBackend()
+    with pytest.raises(ValueError, match="Failed to fetch"):
+        scrape_with_backend(monkeypatch, backend, "http://example.com/article")
+    assert backend.connected == ["93.184.216.34"]
+
+
+def test_dns_rebinding_blocked_at_connect(monkeypatch):
+    """Test that a host re-resolving to a private IP after the URL check is refused"""
+    answers = iter(["93.184.216.34", "127.0.0.1"])
+    monkeypatch.setattr(socket, "gethostbyname", lambda hostname: next(answers))
+    
+    real_is_safe_url = scraper.is_safe_url
+    
+    def check_then_expire(url):
+        safe = real_is_safe_url(url)
+        scraper._resolve.cache_clear()  # the cached answer expires before connecting
+        return safe
+    
+    monkeypatch.setattr(scraper, "is_safe_url", check_then_expire)
+    
+    backend = RecordingBackend()
+    with pytest.raises(ValueError, match="blocked"):
+        scrape_with_backend(monkeypatch, backend, "http://rebind.example.com/")
+    assert backend.connected == []
+
+
+def test_async_client_does_not_share_cookies(monkeypatch):
+    """Cookies set during one scrape are not sent on a later scrape of the same host"""
+    # Only cookie handling is under test; the SSRF hook has its own tests
+    monkeypatch.setattr(scraper, "is_safe_url", lambda url: True)
+    sent_cookies = []
+    
+    def handler(request):
+        sent_cookies.append(request.headers.get("cookie"))
+        return httpx.Response(
+            200,
+            headers={"Set-Cookie": "session=first-user; Path=/"},
+            html="<html><body><p>Article text.</p></body></html>"
+        )
+    
+    async def scrape_twice():
+        client = scraper._new_async_client(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(scraper, "_async_client", client)
+        try:
+            await scraper.fetch_article_text_async("http://example.com/a")
+            await scraper.fetch_article_text_async("http://example.com/b")
+        finally:
+            await client.aclose()
+    
+    asyncio.run(scrape_twice())
+    assert sent_cookies == [None, None]
+
+
 def test_analyze_url_ssrf_protection(client):
     """Test that URL analysis endpoint blocks SSRF attempts"""
     # Try to analyze localhost